@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the scrape -> transform -> serve workflow.
+
+The scraping stack (requests, bs4, lxml) is only imported by the scrape
+stage, so `transform` and `serve` start without it.
+"""
+import argparse
+import os
+import sys
+from typing import Dict, Iterable, Iterator, Optional
+
+import server
+import transform_data
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRAPER_DIR = os.path.join(ROOT_DIR, 'scraper')
+DATA_DIR = os.path.join(ROOT_DIR, 'data')
+
+
+def _add_scraper_path():
+    if SCRAPER_DIR not in sys.path:
+        sys.path.insert(0, SCRAPER_DIR)
+
+
+def _import_scraper():
+    """Import the scraper module (and with it the scraping stack) on demand."""
+    _add_scraper_path()
+    import scraper
+    return scraper
+
+
+def iter_scrape(args: argparse.Namespace) -> Iterator[Dict]:
+    """
+    Scrape input medications, saving the raw results as they arrive.
+
+    Yields each result as a dict once it has been saved.
+    """
+    scraper_module = _import_scraper()
+
+    medications = scraper_module.iter_medications(args.input)
+
+    archive = scraper_module.PageArchive(args.archive) if args.archive else None
+    scraper = scraper_module.VetSearchScraper(delay=args.delay, archive=archive, prefetch=args.prefetch,
+                                              prefetch_budget=args.prefetch_budget)
+    results = scraper.iter_scrape(medications, test_mode=args.test)
+
+    for result in scraper_module.write_results(results, args.output, args.report):
+        yield result.to_dict()
+
+
+def scrape(args: argparse.Namespace):
+    """Scrape all input medications and save the raw results."""
+    for _ in iter_scrape(args):
+        pass
+
+
+def transform(args: argparse.Namespace, scraped: Optional[Iterable[Dict]] = None) -> bool:
+    """Transform scraped records, streaming them from disk unless given."""
+    if scraped is None:
+        return transform_data.transform_data(args.output, args.frontend_output)
+
+    print("🔄 Transforming medications...")
+    transform_data.write_frontend_data(transform_data.transform_records(scraped), args.frontend_output)
+    return True
+
+
+def _replay(med: Dict, variants: Dict[str, list], spc_pages: Dict[str, Dict]) -> Optional[Dict]:
+    """
+    Rebuild a scraped record from its archived pages.
+
+    Returns None if a page the record depends on is not in the archive.
+    """
+    from matching import select_best_variant
+    from records import MedicationResult
+
+    product_url = med.get('product_url')
+    if product_url not in variants:
+        return None
+
+    result = MedicationResult(input_name=med['input_name'], varenr=med['varenr'], product_url=product_url)
+    best_variant = select_best_variant(variants[product_url], med['input_name'])
+
+    if not best_variant:
+        result.fail("No SPC variants found", "No SPC variants")
+        return result.to_dict()
+
+    parsed_data = spc_pages.get(best_variant['url'])
+    if parsed_data is None:
+        return None
+
+    result.found = True
+    result.exact_match = best_variant['exact_match']
+    result.variant_name = best_variant['name']
+    result.spc_url = best_variant['url']
+    result.aktivt_stof = parsed_data['aktivt_stof']
+    result.indikationer = parsed_data['indikationer']
+    return result.to_dict()
+
+
+def reparse(args: argparse.Namespace) -> bool:
+    """
+    Rebuild scraped records from archived pages, without network traffic.
+
+    Each record's product page is parsed for variants again, the best variant
+    is selected again, and its SPC page is parsed. The scraped data file is
+    streamed three times (product URLs, SPC URLs, rewrite), so only URLs and
+    parse results are held in memory.
+    """
+    _add_scraper_path()
+    from archive import PageArchive, reparse_archive
+    from matching import select_best_variant
+    from streaming import JsonArrayWriter, iter_medications
+
+    if not os.path.exists(args.output):
+        print(f"❌ Error: {args.output} not found!")
+        return False
+
+    archive = PageArchive(args.archive)
+
+    product_urls = {med['product_url'] for med in iter_medications(args.output) if med.get('product_url')}
+    variants = reparse_archive(archive, product_urls, 'product', workers=args.jobs)
+
+    spc_urls = set()
+    for med in iter_medications(args.output):
+        best_variant = select_best_variant(variants.get(med.get('product_url')), med['input_name'])
+        if best_variant:
+            spc_urls.add(best_variant['url'])
+    spc_pages = reparse_archive(archive, spc_urls, 'spc', workers=args.jobs)
+
+    replayed_count = 0
+    changed = 0
+    not_archived = 0
+    # Replaces the file only once it has been written completely
+    with JsonArrayWriter(args.output) as out:
+        for med in iter_medications(args.output):
+            replayed = _replay(med, variants, spc_pages)
+            if replayed is None:
+                # Product not found on vetisearch.dk, or pages missing from the archive
+                if med.get('product_url'):
+                    not_archived += 1
+                out.write(med)
+                continue
+            replayed_count += 1
+            if replayed != med:
+                changed += 1
+            out.write(replayed)
+
+    print(f"✅ Replayed {replayed_count} of {out.count} medications from the archive, {changed} changed")
+    print(f"   Saved to {args.output}")
+    if not_archived:
+        print(f"⚠️  {not_archived} medications need a page that is not in the archive and were left as "
+              f"they are; scrape them again to update them")
+
+    return True
+
+
+def serve(args: argparse.Namespace):
+    server.serve(args.directory, args.port)
+
+
+def run_all(args: argparse.Namespace):
+    """
+    Run every stage in one process, handing records over in memory.
+
+    Scraping and transforming run interleaved: each record is written to the
+    scraped data file and the frontend data file as soon as it is scraped.
+    """
+    print("Steps 1-2/3: Running scraper and transforming data for frontend...")
+    print("=" * 60)
+    transform(args, scraped=iter_scrape(args))
+
+    print("\nStep 3/3: Starting local server...")
+    print("=" * 60)
+    serve(args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Danish vet med flash cards workflow')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scrape_options = argparse.ArgumentParser(add_help=False)
+    scrape_options.add_argument('--test', action='store_true', help='Test mode: scrape first 3 medications only')
+    scrape_options.add_argument('--delay', type=float, default=1.5, help='Delay between requests in seconds')
+    scrape_options.add_argument('--input', default=os.path.join(DATA_DIR, 'medications_input.json'),
+                                help='Input medications JSON file')
+    scrape_options.add_argument('--report', default=os.path.join(DATA_DIR, 'scraping_report.txt'),
+                                help='Output file for the scraping report')
+    scrape_options.add_argument('--prefetch', action='store_true',
+                                help="Resolve the next medication's product URL while scraping the current one; "
+                                     "only faster when responses take longer than --delay, since all requests "
+                                     "share one schedule")
+    scrape_options.add_argument('--prefetch-budget', type=int, default=1,
+                                help='Number of upcoming medications whose lookups may run ahead')
+
+    # Shared by scrape (writes it), reparse (updates it) and transform (reads it)
+    scraped_options = argparse.ArgumentParser(add_help=False)
+    scraped_options.add_argument('--output', default=transform_data.INPUT_FILE, help='Scraped data file')
+
+    archive_options = argparse.ArgumentParser(add_help=False)
+    archive_options.add_argument('--archive', default=os.path.join(DATA_DIR, 'archive'),
+                                 help='Directory for the raw HTML archive')
+
+    transform_options = argparse.ArgumentParser(add_help=False)
+    transform_options.add_argument('--frontend-output', default=transform_data.OUTPUT_FILE,
+                                   help='Frontend data file')
+
+    serve_options = argparse.ArgumentParser(add_help=False)
+    serve_options.add_argument('--directory', default=server.DIRECTORY, help='Directory to serve')
+    serve_options.add_argument('--port', type=int, default=server.PORT, help='Port to listen on')
+
+    scrape_parser = subparsers.add_parser('scrape', parents=[scrape_options, scraped_options, archive_options],
+                                          help='Scrape vetisearch.dk')
+    reparse_parser = subparsers.add_parser('reparse', parents=[scraped_options, archive_options],
+                                           help='Rebuild scraped data from archived pages with the current parser')
+    reparse_parser.add_argument('--jobs', type=int, default=None, help='Parser processes (default: CPU count)')
+    subparsers.add_parser('transform', parents=[scraped_options, transform_options],
+                          help='Transform scraped data for the frontend')
+    subparsers.add_parser('serve', parents=[serve_options],
+                          help='Serve the frontend locally')
+    all_parser = subparsers.add_parser('all', parents=[scrape_options, scraped_options, archive_options,
+                                                       transform_options, serve_options],
+                                       help='Scrape, transform and serve in one process')
+    for subparser in (scrape_parser, all_parser):
+        subparser.add_argument('--no-archive', dest='archive', action='store_const', const=None,
+                               help='Do not keep fetched HTML')
+
+    args = parser.parse_args()
+
+    if args.command == 'scrape':
+        scrape(args)
+    elif args.command == 'reparse':
+        if not reparse(args):
+            sys.exit(1)
+    elif args.command == 'transform':
+        if not transform(args):
+            sys.exit(1)
+    elif args.command == 'serve':
+        serve(args)
+    elif args.command == 'all':
+        run_all(args)
+
+
+if __name__ == "__main__":
+    main()
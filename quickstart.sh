@@ -26,5 +26,6 @@ echo "1. Run scraper (test): cd scraper && python3 scraper.py --test"
 echo "2. Run scraper (full):  cd scraper && python3 scraper.py"
 echo "3. Transform data:      python3 transform_data.py"
 echo "4. Test locally:        python3 server.py"
+echo "   (or all at once:     python3 pipeline.py all --test)"
 echo ""
 echo "See README.md for full documentation."
@@ -31,31 +31,12 @@ echo "2) Full scrape (all 75 medications)"
 read -p "Enter choice (1 or 2): " choice
 
 echo ""
-echo "Step 1/3: Running scraper..."
-echo "=========================================="
 
 if [ "$choice" == "1" ]; then
-    cd scraper
-    python3 scraper.py --test
-    cd ..
+    python3 pipeline.py all --test
 elif [ "$choice" == "2" ]; then
-    cd scraper
-    python3 scraper.py
-    cd ..
+    python3 pipeline.py all
 else
     echo "❌ Invalid choice"
     exit 1
 fi
-
-echo ""
-echo "Step 2/3: Transforming data for frontend..."
-echo "=========================================="
-python3 transform_data.py
-
-echo ""
-echo "Step 3/3: Starting local server..."
-echo "=========================================="
-echo ""
-echo "✅ Setup complete! Starting server..."
-echo ""
-python3 server.py
@@ -0,0 +1,194 @@
+"""
+Page Archive - Append-only compressed store of fetched HTML for offline re-parsing
+"""
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory file locks (Windows): only one process may write an archive
+    fcntl = None
+
+PACK_FILE = 'pages.pack'
+INDEX_FILE = 'pages.idx'
+CACHE_FILE = 'parse_cache.json'
+# Archived pages are either product pages (variant links) or SPC pages
+PAGE_KINDS = ('product', 'spc')
+PARSER_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parser.py')
+
+
+def parser_version() -> str:
+    """Version of the current parser, derived from its source code."""
+    with open(PARSER_SOURCE, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+class PageArchive:
+    """
+    Fetched pages stored as zlib-compressed records in a single pack file.
+
+    Every record has a line in a JSONL index with its URL, fetch time, offset,
+    compressed length and the SHA-256 of the HTML. Where fcntl is available,
+    appends take a file lock, so several scraper processes can share one
+    archive.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.pack_path = os.path.join(directory, PACK_FILE)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def store(self, url: str, html: str) -> Dict:
+        """Append a fetched page and return its index entry."""
+        raw = html.encode('utf-8')
+        data = zlib.compress(raw)
+        entry = {
+            'url': url,
+            'fetched_at': time.time(),
+            'sha256': hashlib.sha256(raw).hexdigest(),
+            'length': len(data)
+        }
+
+        with self._lock, open(self.pack_path, 'ab') as pack:
+            if fcntl:
+                fcntl.flock(pack, fcntl.LOCK_EX)
+            try:
+                entry['offset'] = pack.seek(0, os.SEEK_END)
+                pack.write(data)
+                pack.flush()
+                with open(self.index_path, 'a', encoding='utf-8') as index:
+                    index.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            finally:
+                if fcntl:
+                    fcntl.flock(pack, fcntl.LOCK_UN)
+
+        return entry
+
+    def entries(self) -> Iterator[Dict]:
+        """Yield index entries in the order the pages were fetched."""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                # A crash mid-append can leave a truncated last line
+                if line.endswith('\n'):
+                    yield json.loads(line)
+
+    def latest(self) -> Dict[str, Dict]:
+        """Most recent index entry per URL."""
+        latest = {}
+        for entry in self.entries():
+            latest[entry['url']] = entry
+        return latest
+
+
+def read_record(pack: mmap.mmap, offset: int, length: int) -> str:
+    """Decompress one record from a memory-mapped pack file."""
+    return zlib.decompress(pack[offset:offset + length]).decode('utf-8')
+
+
+_worker_pack: Optional[mmap.mmap] = None
+
+
+def _init_worker(pack_path: str):
+    """Map the pack file once per pool process."""
+    global _worker_pack
+    with open(pack_path, 'rb') as f:
+        _worker_pack = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _parse_record(kind: str, offset: int, length: int):
+    from parser import extract_variant_links, parse_spc_page
+    html = read_record(_worker_pack, offset, length)
+    if kind == 'product':
+        return extract_variant_links(html)
+    return parse_spc_page(html)
+
+
+def load_cache(path: str) -> Dict:
+    """Load memoized parse results; a missing or unreadable cache is empty."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Ignoring unreadable parse cache {path}: {e}")
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(path: str, cache: Dict):
+    """Write the parse cache to a temporary file and swap it into place."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def reparse_archive(archive: PageArchive, urls: Iterable[str], kind: str,
+                    workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run the current parser over the latest archived copy of each URL.
+
+    Parse results are memoized by (kind, content hash, parser version), so
+    pages that are unchanged since the last run with the same parser are
+    skipped.
+
+    Args:
+        kind: 'product' (extract_variant_links) or 'spc' (parse_spc_page)
+
+    Returns:
+        Dict mapping URL to the parser output, for archived URLs only
+    """
+    latest = archive.latest()
+    version = parser_version()
+    cache_path = os.path.join(archive.directory, CACHE_FILE)
+
+    cache = load_cache(cache_path)
+    # Results from older parser versions will never be looked up again
+    cache = {key: value for key, value in cache.items()
+             if key.endswith(f":{version}") and key.split(':', 1)[0] in PAGE_KINDS}
+
+    entries = {url: latest[url] for url in urls if url in latest}
+    missing = {}
+    for entry in entries.values():
+        key = f"{kind}:{entry['sha256']}:{version}"
+        if key not in cache:
+            missing[key] = entry
+
+    print(f"🗄️  {len(entries)} archived {kind} pages, {len(entries) - len(missing)} cached, "
+          f"{len(missing)} to parse")
+
+    if missing:
+        keys = list(missing)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(archive.pack_path,)) as pool:
+            parsed = pool.map(_parse_record,
+                              [kind] * len(keys),
+                              [missing[key]['offset'] for key in keys],
+                              [missing[key]['length'] for key in keys],
+                              chunksize=16)
+            cache.update(zip(keys, parsed))
+
+        save_cache(cache_path, cache)
+
+    return {
+        url: cache[f"{kind}:{entry['sha256']}:{version}"]
+        for url, entry in entries.items()
+    }
@@ -0,0 +1,70 @@
+"""
+Matching - Pick the product variant that best matches a medication name
+"""
+import re
+from typing import Dict, List, Optional
+
+
+def calculate_match_score(input_name: str, variant_name: str) -> int:
+    """
+    Calculate how well a variant matches the input name.
+    Returns score 0-100.
+    """
+    input_lower = input_name.lower()
+    variant_lower = variant_name.lower()
+
+    score = 0
+
+    # Extract concentration patterns
+    concentration_pattern = r'\d+\s*(mg|g|ml|%|mikrog|mcg)'
+
+    input_concentrations = set(re.findall(concentration_pattern, input_lower))
+    variant_concentrations = set(re.findall(concentration_pattern, variant_lower))
+
+    # Bonus for matching concentrations
+    if input_concentrations and variant_concentrations:
+        matches = input_concentrations & variant_concentrations
+        score += len(matches) * 30
+
+    # Extract form patterns
+    forms = ['inj', 'tablet', 'kapsel', 'spot-on', 'øredråber', 'øjendråber',
+             'salve', 'gel', 'suspension', 'emulsion', 'opløsning']
+
+    for form in forms:
+        if form in input_lower and form in variant_lower:
+            score += 20
+
+    # Check for word overlap
+    input_words = set(input_lower.split())
+    variant_words = set(variant_lower.split())
+    common_words = input_words & variant_words
+
+    score += len(common_words) * 10
+
+    return min(score, 100)
+
+
+def select_best_variant(variants: List[Dict], input_name: str) -> Optional[Dict]:
+    """
+    Select the best matching variant from a list.
+    Returns the variant dict with added 'exact_match' boolean.
+    """
+    if not variants:
+        return None
+
+    # Calculate scores
+    scored_variants = [
+        (variant, calculate_match_score(input_name, variant['name']))
+        for variant in variants
+    ]
+
+    # Sort by score (highest first)
+    scored_variants.sort(key=lambda x: x[1], reverse=True)
+
+    best_variant, best_score = scored_variants[0]
+
+    return {
+        **best_variant,
+        'exact_match': best_score > 60,  # Threshold for "close enough"
+        'match_score': best_score
+    }
@@ -0,0 +1,78 @@
+"""
+Records - Compact result records for scraped medications
+"""
+from typing import Dict, List, Optional
+
+
+class MedicationResult:
+    """Outcome of scraping one medication."""
+
+    __slots__ = ('input_name', 'varenr', 'found', 'exact_match', 'variant_name', 'product_url',
+                 'spc_url', 'aktivt_stof', 'indikationer', 'error', 'failure_reason')
+
+    def __init__(self, input_name: str, varenr: str, found: bool = False,
+                 exact_match: Optional[bool] = None, variant_name: Optional[str] = None,
+                 product_url: Optional[str] = None, spc_url: Optional[str] = None,
+                 aktivt_stof: Optional[List[str]] = None, indikationer: Optional[List[str]] = None,
+                 error: Optional[str] = None, failure_reason: Optional[str] = None):
+        self.input_name = input_name
+        self.varenr = varenr
+        self.found = found
+        self.exact_match = exact_match
+        self.variant_name = variant_name
+        self.product_url = product_url
+        self.spc_url = spc_url
+        self.aktivt_stof = aktivt_stof
+        self.indikationer = indikationer
+        self.error = error
+        # Short reason shown in the scraping report; not part of the saved data
+        self.failure_reason = failure_reason
+
+    def fail(self, error: str, reason: Optional[str] = None):
+        """Mark the medication as failed."""
+        self.error = error
+        self.failure_reason = reason or error
+
+    def to_dict(self) -> Dict:
+        """Dict in the format of data/medications_scraped.json."""
+        data = {
+            'input_name': self.input_name,
+            'varenr': self.varenr,
+            'found': self.found
+        }
+
+        if self.found:
+            data.update({
+                'exact_match': self.exact_match,
+                'variant_name': self.variant_name,
+                'product_url': self.product_url,
+                'spc_url': self.spc_url,
+                'aktivt_stof': self.aktivt_stof,
+                'indikationer': self.indikationer
+            })
+
+        elif self.product_url is not None:
+            # Lets `reparse` retry failed medications from the archived product page
+            data['product_url'] = self.product_url
+
+        if self.error is not None:
+            data['error'] = self.error
+
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MedicationResult':
+        """Build a record from a saved dict (inverse of to_dict)."""
+        return cls(
+            input_name=data['input_name'],
+            varenr=data['varenr'],
+            found=data['found'],
+            exact_match=data.get('exact_match'),
+            variant_name=data.get('variant_name'),
+            product_url=data.get('product_url'),
+            spc_url=data.get('spc_url'),
+            aktivt_stof=data.get('aktivt_stof'),
+            indikationer=data.get('indikationer'),
+            error=data.get('error'),
+            failure_reason=data.get('error')
+        )
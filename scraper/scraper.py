@@ -2,24 +2,88 @@
 """
 Main scraper orchestration for vetisearch.dk
 """
-import json
+import collections
+import itertools
+import os
+import socket
+import sys
 import time
 import argparse
-from typing import Dict, List, Optional
+import multiprocessing
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 from url_mapper import find_product_url, generate_slug_variants
 from parser import parse_spc_page, extract_variant_links
+from matching import select_best_variant
+from work_queue import WorkQueue
+from archive import PageArchive
+from records import MedicationResult
+from streaming import JsonArrayWriter, ReportWriter, iter_medications
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+DEFAULT_INPUT = os.path.join(DATA_DIR, 'medications_input.json')
+DEFAULT_OUTPUT = os.path.join(DATA_DIR, 'medications_scraped.json')
+DEFAULT_REPORT = os.path.join(DATA_DIR, 'scraping_report.txt')
+DEFAULT_ARCHIVE = os.path.join(DATA_DIR, 'archive')
+RATE_LIMIT_HOST = 'vetisearch.dk'
+
+
+class RequestPacer:
+    """
+    Space out requests to vetisearch.dk by `delay` seconds.
+
+    Every HTTP request reserves the next free slot before it is sent. With a
+    work queue the slots are reserved in the queue database, so the spacing
+    holds across all worker processes on the host, and the worker's current
+    lease (if set) is renewed to cover the wait and the request.
+    """
+
+    def __init__(self, delay: float, queue: Optional[WorkQueue] = None):
+        self.delay = delay
+        self.queue = queue
+        # (item_id, worker_id) of the queue item being scraped
+        self.lease: Optional[Tuple[int, str]] = None
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def reserve(self) -> float:
+        """Reserve the next slot, returning seconds until it starts."""
+        with self._lock:
+            if self.queue:
+                pause = self.queue.reserve_slot(RATE_LIMIT_HOST, self.delay)
+                if self.lease:
+                    self.queue.renew(*self.lease, extra=max(pause, 0.0))
+                return pause
+
+            now = time.time()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.delay
+            return slot - now
+
+    def wait(self):
+        """Block until this caller may send its request."""
+        pause = self.reserve()
+        if pause > 0:
+            time.sleep(pause)
 
 
 class VetSearchScraper:
-    def __init__(self, delay: float = 1.5):
+    def __init__(self, delay: float = 1.5, archive: Optional[PageArchive] = None,
+                 prefetch: bool = False, prefetch_budget: int = 1,
+                 pacer: Optional[RequestPacer] = None):
         self.delay = delay
         self.base_url = "https://vetisearch.dk"
         self.session = self._create_session()
-        self.failed_medications = []
+        self.archive = archive
+        self.pacer = pacer or RequestPacer(delay)
+        self.prefetch = prefetch
+        # Upcoming medications whose product URL lookups may run ahead
+        self.prefetch_budget = max(1, prefetch_budget)
 
     def _create_session(self) -> requests.Session:
         """Create a requests session with retry logic."""
@@ -42,245 +106,322 @@ class VetSearchScraper:
 
         return session
 
-    def calculate_match_score(self, input_name: str, variant_name: str) -> int:
-        """
-        Calculate how well a variant matches the input name.
-        Returns score 0-100.
-        """
-        input_lower = input_name.lower()
-        variant_lower = variant_name.lower()
-
-        score = 0
-
-        # Extract concentration patterns
-        import re
-        concentration_pattern = r'\d+\s*(mg|g|ml|%|mikrog|mcg)'
-
-        input_concentrations = set(re.findall(concentration_pattern, input_lower))
-        variant_concentrations = set(re.findall(concentration_pattern, variant_lower))
-
-        # Bonus for matching concentrations
-        if input_concentrations and variant_concentrations:
-            matches = input_concentrations & variant_concentrations
-            score += len(matches) * 30
-
-        # Extract form patterns
-        forms = ['inj', 'tablet', 'kapsel', 'spot-on', 'øredråber', 'øjendråber',
-                 'salve', 'gel', 'suspension', 'emulsion', 'opløsning']
-
-        for form in forms:
-            if form in input_lower and form in variant_lower:
-                score += 20
-
-        # Check for word overlap
-        input_words = set(input_lower.split())
-        variant_words = set(variant_lower.split())
-        common_words = input_words & variant_words
+    def fetch(self, url: str) -> requests.Response:
+        """GET a page, keeping a copy in the archive if one is configured."""
+        self.pacer.wait()
+        response = self.session.get(url, timeout=10)
+        response.raise_for_status()
 
-        score += len(common_words) * 10
+        if self.archive:
+            self.archive.store(url, response.text)
 
-        return min(score, 100)
+        return response
 
-    def select_best_variant(self, variants: List[Dict], input_name: str) -> Dict:
-        """
-        Select the best matching variant from a list.
-        Returns the variant dict with added 'exact_match' boolean.
-        """
-        if not variants:
-            return None
-
-        # Calculate scores
-        scored_variants = [
-            (variant, self.calculate_match_score(input_name, variant['name']))
-            for variant in variants
-        ]
-
-        # Sort by score (highest first)
-        scored_variants.sort(key=lambda x: x[1], reverse=True)
-
-        best_variant, best_score = scored_variants[0]
-
-        return {
-            **best_variant,
-            'exact_match': best_score > 60,  # Threshold for "close enough"
-            'match_score': best_score
-        }
-
-    def scrape_medication(self, name: str, varenr: str) -> Dict:
+    def scrape_medication(self, name: str, varenr: str,
+                          product_url_future: Optional[Future] = None) -> MedicationResult:
         """
         Scrape data for a single medication.
 
+        Args:
+            product_url_future: Prefetched result of find_product_url(name), if any
+
         Returns:
-            Dict with medication data or error information
+            MedicationResult with medication data or error information
         """
         print(f"Scraping: {name}...", end=" ")
 
-        result = {
-            'input_name': name,
-            'varenr': varenr,
-            'found': False
-        }
+        result = MedicationResult(input_name=name, varenr=varenr)
 
         try:
             # Step 1: Find product URL
-            product_url = find_product_url(name)
+            if product_url_future:
+                product_url = product_url_future.result()
+            else:
+                product_url = find_product_url(name, before_request=self.pacer.wait)
+            # Kept on failures too, so `reparse` can replay them from the archive
+            result.product_url = product_url
 
             if not product_url:
                 print("❌ Product not found")
-                result['error'] = "Product not found on vetisearch.dk"
-                self.failed_medications.append((name, varenr, "Product not found"))
+                result.fail("Product not found on vetisearch.dk", "Product not found")
                 return result
 
             # Step 2: Get product page to find variants
-            response = self.session.get(product_url, timeout=10)
-            response.raise_for_status()
+            response = self.fetch(product_url)
 
             # Step 3: Extract variant links
             variants = extract_variant_links(response.text, self.base_url)
 
             if not variants:
                 print("⚠️  No SPC variants found")
-                result['error'] = "No SPC variants found"
-                self.failed_medications.append((name, varenr, "No SPC variants"))
+                result.fail("No SPC variants found", "No SPC variants")
                 return result
 
             # Step 4: Select best matching variant
-            best_variant = self.select_best_variant(variants, name)
+            best_variant = select_best_variant(variants, name)
 
             if not best_variant:
                 print("❌ No suitable variant")
-                result['error'] = "No suitable variant found"
-                self.failed_medications.append((name, varenr, "No suitable variant"))
+                result.fail("No suitable variant found", "No suitable variant")
                 return result
 
             # Step 5: Scrape the SPC page
-            spc_response = self.session.get(best_variant['url'], timeout=10)
-            spc_response.raise_for_status()
+            spc_response = self.fetch(best_variant['url'])
 
             # Step 6: Parse the SPC page
             parsed_data = parse_spc_page(spc_response.text)
 
             # Step 7: Build result
-            result.update({
-                'found': True,
-                'exact_match': best_variant['exact_match'],
-                'variant_name': best_variant['name'],
-                'product_url': product_url,
-                'spc_url': best_variant['url'],
-                'aktivt_stof': parsed_data['aktivt_stof'],
-                'indikationer': parsed_data['indikationer']
-            })
+            result.found = True
+            result.exact_match = best_variant['exact_match']
+            result.variant_name = best_variant['name']
+            result.spc_url = best_variant['url']
+            result.aktivt_stof = parsed_data['aktivt_stof']
+            result.indikationer = parsed_data['indikationer']
 
             match_indicator = "✓" if best_variant['exact_match'] else "~"
             print(f"{match_indicator} Success (score: {best_variant.get('match_score', 0)})")
 
         except requests.RequestException as e:
             print(f"❌ Network error: {str(e)[:50]}")
-            result['error'] = f"Network error: {str(e)}"
-            self.failed_medications.append((name, varenr, f"Network error: {str(e)}"))
+            result.fail(f"Network error: {str(e)}")
 
         except Exception as e:
             print(f"❌ Error: {str(e)[:50]}")
-            result['error'] = str(e)
-            self.failed_medications.append((name, varenr, str(e)))
+            result.fail(str(e))
 
         return result
 
-    def scrape_all(self, medications: List[Dict], test_mode: bool = False) -> List[Dict]:
+    def iter_scrape(self, medications: Iterable[Dict], test_mode: bool = False) -> Iterator[MedicationResult]:
         """
-        Scrape all medications.
+        Scrape medications one at a time, yielding each result as it is ready.
 
         Args:
-            medications: List of medication dicts with 'name' and 'varenr'
+            medications: Iterable of medication dicts with 'name' and 'varenr'
             test_mode: If True, only scrape first 3 medications
-
-        Returns:
-            List of scraped medication data
         """
+        total = len(medications) if hasattr(medications, '__len__') else None
+
         if test_mode:
-            medications = medications[:3]
-            print(f"🧪 TEST MODE: Scraping first {len(medications)} medications\n")
+            medications = itertools.islice(medications, 3)
+            total = min(total, 3) if total is not None else 3
+            print(f"🧪 TEST MODE: Scraping first {total} medications\n")
+        elif total is not None:
+            print(f"🚀 Starting scrape of {total} medications\n")
         else:
-            print(f"🚀 Starting scrape of {len(medications)} medications\n")
-
-        results = []
-
-        for i, med in enumerate(medications, 1):
-            print(f"[{i}/{len(medications)}] ", end="")
-
-            result = self.scrape_medication(med['name'], med['varenr'])
-            results.append(result)
-
-            # Rate limiting
-            if i < len(medications):
-                time.sleep(self.delay)
-
-        return results
-
-    def generate_report(self, results: List[Dict]) -> str:
-        """Generate a summary report of the scraping results."""
-        total = len(results)
-        successful = sum(1 for r in results if r['found'])
-        failed = total - successful
-
-        report = "=" * 50 + "\n"
-        report += "SCRAPING REPORT\n"
-        report += "=" * 50 + "\n\n"
-        report += f"Total medications: {total}\n"
-        report += f"Successfully scraped: {successful}\n"
-        report += f"Failed: {failed}\n\n"
+            print(f"🚀 Starting scrape\n")
 
-        if self.failed_medications:
-            report += "Failed medications (need manual data entry):\n"
-            report += "-" * 50 + "\n"
-            for i, (name, varenr, reason) in enumerate(self.failed_medications, 1):
-                varenr_str = varenr if varenr else "N/A"
-                report += f"{i}. {name}\n"
-                report += f"   Varenr: {varenr_str}\n"
-                report += f"   Reason: {reason}\n\n"
+        medications = iter(medications)
+        executor = ThreadPoolExecutor(max_workers=self.prefetch_budget) if self.prefetch else None
+        # Upcoming medications, each with its product URL lookup already started
+        # when prefetching. The window size caps how many lookups run ahead, and
+        # every lookup request still draws its slot from the shared pacer.
+        window = collections.deque()
 
-        # Stats on exact matches
-        exact_matches = sum(1 for r in results if r.get('found') and r.get('exact_match'))
-        approximate_matches = successful - exact_matches
+        def enqueue(med: Dict):
+            lookup = None
+            if executor:
+                lookup = executor.submit(find_product_url, med['name'], 10, self.pacer.wait)
+            window.append((med, lookup))
 
-        report += f"\nMatch quality:\n"
-        report += f"  Exact matches: {exact_matches}\n"
-        report += f"  Approximate matches: {approximate_matches}\n"
-
-        return report
+        try:
+            for med in itertools.islice(medications, self.prefetch_budget if executor else 1):
+                enqueue(med)
+
+            for i in itertools.count(1):
+                if not window:
+                    break
+                med, lookup = window.popleft()
+
+                # Refill the window so the next lookup overlaps with this
+                # medication's product and SPC page requests
+                upcoming = next(medications, None)
+                if upcoming is not None:
+                    enqueue(upcoming)
+
+                print(f"[{i}/{total}] " if total is not None else f"[{i}] ", end="")
+
+                yield self.scrape_medication(med['name'], med.get('varenr') or '', product_url_future=lookup)
+        finally:
+            if executor:
+                for _, lookup in window:
+                    lookup.cancel()
+                executor.shutdown(wait=True)
+
+
+def run_worker(queue_path: str, delay: float, lease_timeout: float, max_attempts: int,
+               archive_dir: Optional[str] = None, poll_interval: float = 5.0) -> int:
+    """
+    Lease and scrape medications from a shared queue until it is drained.
+
+    Every request reserves its slot through the queue, so the delay between
+    requests holds across all workers combined rather than per worker.
+
+    Returns:
+        Number of medications scraped by this worker
+    """
+    queue = WorkQueue(queue_path, lease_timeout=lease_timeout, max_attempts=max_attempts)
+    scraper = VetSearchScraper(delay=delay, archive=PageArchive(archive_dir) if archive_dir else None,
+                               pacer=RequestPacer(delay, queue=queue))
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+
+    try:
+        while True:
+            item = queue.lease(worker_id)
+
+            if item is None:
+                # Other workers may still crash and leave expiring leases behind
+                if queue.active_leases():
+                    time.sleep(poll_interval)
+                    continue
+                break
+
+            item_id, name, varenr = item
+
+            print(f"[{worker_id}] ", end="")
+            scraper.pacer.lease = (item_id, worker_id)
+            try:
+                result = scraper.scrape_medication(name, varenr)
+            finally:
+                scraper.pacer.lease = None
+
+            if not queue.complete(item_id, worker_id, result.to_dict()):
+                print(f"[{worker_id}] ⚠️  Lease on {name} expired, result discarded")
+            processed += 1
+    finally:
+        queue.close()
+
+    return processed
+
+
+def write_results(results: Iterable[MedicationResult], output_file: str,
+                  report_file: str) -> Iterator[MedicationResult]:
+    """
+    Write scraped results and the scraping report to disk as results arrive.
+
+    Each result is passed on after it has been written, so callers can
+    process the stream further; iterate to the end to finish both files.
+    """
+    report = ReportWriter()
+
+    try:
+        with JsonArrayWriter(output_file) as out:
+            for result in results:
+                out.write(result.to_dict())
+                report.add(result)
+                yield result
+
+        print(f"\n✅ Results saved to {output_file}")
+
+        # Save report
+        with open(report_file, 'w', encoding='utf-8') as f:
+            report.write(f)
+
+        print(f"📄 Report saved to {report_file}\n")
+        report.write(sys.stdout)
+    finally:
+        report.close()
+
+
+def save_results(results: Iterable[MedicationResult], output_file: str, report_file: str):
+    """Write scraped results and the scraping report to disk."""
+    for _ in write_results(results, output_file, report_file):
+        pass
 
 
 def main():
     parser = argparse.ArgumentParser(description='Scrape vetisearch.dk for medication data')
     parser.add_argument('--test', action='store_true', help='Test mode: scrape first 3 medications only')
     parser.add_argument('--delay', type=float, default=1.5, help='Delay between requests in seconds')
+    parser.add_argument('--input', default=DEFAULT_INPUT, help='Input medications JSON file')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Output file for scraped data')
+    parser.add_argument('--report', default=DEFAULT_REPORT, help='Output file for the scraping report')
+    parser.add_argument('--archive', default=DEFAULT_ARCHIVE, help='Directory for the raw HTML archive')
+    parser.add_argument('--no-archive', action='store_true', help='Do not keep fetched HTML')
+    parser.add_argument('--prefetch', action='store_true',
+                        help="Resolve the next medication's product URL while scraping the current one; "
+                             "only faster when responses take longer than --delay, since all requests "
+                             "share one schedule")
+    parser.add_argument('--prefetch-budget', type=int, default=1,
+                        help='Number of upcoming medications whose lookups may run ahead')
+
+    queue_group = parser.add_argument_group('work-queue mode')
+    queue_group.add_argument('--queue', help='Path of a shared SQLite work queue')
+    queue_group.add_argument('--enqueue', action='store_true', help='Add the input medications to the queue')
+    queue_group.add_argument('--worker', action='store_true', help='Scrape medications leased from the queue')
+    queue_group.add_argument('--workers', type=int, default=1, help='Number of local worker processes')
+    queue_group.add_argument('--lease-timeout', type=float, default=300.0,
+                             help='Seconds before an unfinished lease is handed to another worker')
+    queue_group.add_argument('--max-attempts', type=int, default=3,
+                             help='Leases per medication before it is abandoned as failed')
+    queue_group.add_argument('--merge', action='store_true', help='Write queued results to the output file')
     args = parser.parse_args()
 
-    # Load input medications
-    with open('../data/medications_input.json', 'r', encoding='utf-8') as f:
-        medications = json.load(f)
+    if args.no_archive:
+        args.archive = None
 
-    # Create scraper
-    scraper = VetSearchScraper(delay=args.delay)
-
-    # Scrape
-    results = scraper.scrape_all(medications, test_mode=args.test)
+    if args.queue:
+        run_queue_mode(args)
+        return
 
-    # Save results
-    output_file = '../data/medications_scraped.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    # Stream input medications
+    medications = iter_medications(args.input)
 
-    print(f"\n✅ Results saved to {output_file}")
-
-    # Generate and save report
-    report = scraper.generate_report(results)
-    report_file = '../data/scraping_report.txt'
-    with open(report_file, 'w', encoding='utf-8') as f:
-        f.write(report)
+    # Create scraper
+    scraper = VetSearchScraper(delay=args.delay, archive=PageArchive(args.archive) if args.archive else None,
+                               prefetch=args.prefetch, prefetch_budget=args.prefetch_budget)
 
-    print(f"📄 Report saved to {report_file}\n")
-    print(report)
+    # Scrape
+    results = scraper.iter_scrape(medications, test_mode=args.test)
+
+    save_results(results, args.output, args.report)
+
+
+def run_queue_mode(args: argparse.Namespace):
+    """Coordinator, worker and merge steps of work-queue mode."""
+    if not (args.enqueue or args.worker or args.merge):
+        print("❌ --queue requires at least one of --enqueue, --worker or --merge")
+        return
+
+    if args.enqueue:
+        medications = iter_medications(args.input)
+        if args.test:
+            medications = itertools.islice(medications, 3)
+        # Count medications as the queue consumes them; next(read) is the total
+        read = itertools.count()
+        medications = (med for med, _ in zip(medications, read))
+
+        queue = WorkQueue(args.queue, lease_timeout=args.lease_timeout)
+        added = queue.enqueue(medications)
+        queue.close()
+        print(f"📥 Queued {added} new medications ({next(read) - added} already queued)")
+
+    if args.worker:
+        worker_args = (args.queue, args.delay, args.lease_timeout, args.max_attempts, args.archive)
+        if args.workers > 1:
+            print(f"🚀 Starting {args.workers} workers on {args.queue}\n")
+            processes = [
+                multiprocessing.Process(target=run_worker, args=worker_args)
+                for _ in range(args.workers)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+        else:
+            processed = run_worker(*worker_args)
+            print(f"\n🏁 Worker finished after {processed} medications")
+
+    if args.merge:
+        queue = WorkQueue(args.queue, lease_timeout=args.lease_timeout)
+        unfinished = sum(count for state, count in queue.counts().items() if state not in ('done', 'abandoned'))
+        if unfinished:
+            print(f"⚠️  {unfinished} medications have no result yet and are left out")
+
+        results = (MedicationResult.from_dict(data) for data in queue.results())
+        save_results(results, args.output, args.report)
+        queue.close()
 
 
 if __name__ == "__main__":
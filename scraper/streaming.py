@@ -0,0 +1,208 @@
+"""
+Streaming - Constant-memory readers and writers for large medication catalogues
+"""
+import csv
+import json
+import os
+import re
+import shutil
+import tempfile
+import textwrap
+from typing import Dict, Iterator, TextIO
+
+from records import MedicationResult
+
+CHUNK_SIZE = 64 * 1024
+_NUMBER_TAIL = re.compile(r'[0-9+\-.eE]*\Z')
+
+
+def iter_json_array(f: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator:
+    """
+    Yield the elements of a top-level JSON array one at a time.
+
+    Only the element being decoded and one chunk of input are held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    # What comes next: 'open' ('['), 'first' (element or ']'),
+    # 'separator' (',' or ']') or 'element'
+    expect = 'open'
+
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+
+        if pos == len(buffer):
+            if eof:
+                raise ValueError("Unexpected end of input: JSON array is not closed")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        char = buffer[pos]
+
+        if expect == 'open':
+            if char != '[':
+                raise ValueError("Input is not a JSON array")
+            expect = 'first'
+            pos += 1
+            continue
+
+        if expect == 'separator' or (expect == 'first' and char == ']'):
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+            expect = 'element'
+            pos += 1
+            continue
+
+        if char in ',]':
+            raise ValueError(f"Expected an array element, got {char!r}")
+
+        try:
+            element, end = decoder.raw_decode(buffer, pos)
+            # A number followed only by characters that could continue it
+            # (e.g. "12" before ".5") may be cut off at the chunk boundary
+            truncated = (not eof and isinstance(element, (int, float)) and not isinstance(element, bool)
+                         and _NUMBER_TAIL.match(buffer, end) is not None)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            truncated = True
+
+        if truncated:
+            # Element is cut off at the end of the buffer; read more
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        yield element
+        pos = end
+        expect = 'separator'
+
+
+def iter_medications(path: str) -> Iterator[Dict]:
+    """
+    Stream medications ({'name', 'varenr'}) from a JSON array, JSONL or CSV file.
+
+    The format is chosen by file extension; anything other than .jsonl,
+    .ndjson or .csv is read as a JSON array.
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    with open(path, 'r', encoding='utf-8', newline='' if extension == '.csv' else None) as f:
+        if extension in ('.jsonl', '.ndjson'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        elif extension == '.csv':
+            for row in csv.DictReader(f):
+                yield {'name': row['name'], 'varenr': row.get('varenr') or ''}
+        else:
+            yield from iter_json_array(f)
+
+
+class JsonArrayWriter:
+    """
+    Write a JSON array one element at a time, formatted like json.dump(indent=2).
+
+    The array is written to a temporary file next to the target and moved
+    into place only when the writer is closed without an error, so an
+    interrupted run leaves the previous file untouched.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, self._tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.",
+                                              suffix='.tmp')
+        self.file = os.fdopen(fd, 'w', encoding='utf-8')
+        self.count = 0
+
+    def write(self, element):
+        self.file.write(',\n' if self.count else '[\n')
+        self.file.write(textwrap.indent(json.dumps(element, ensure_ascii=False, indent=2), '  '))
+        self.count += 1
+
+    def close(self):
+        """Finish the array and replace the target file with it."""
+        self.file.write('\n]' if self.count else '[]')
+        self.file.close()
+
+        # mkstemp creates the file as 0600; keep the target's permissions
+        mode = os.stat(self.path).st_mode & 0o777 if os.path.exists(self.path) else 0o644
+        os.chmod(self._tmp_path, mode)
+        os.replace(self._tmp_path, self.path)
+
+    def discard(self):
+        """Drop everything written so far, leaving the target file as it was."""
+        self.file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class ReportWriter:
+    """
+    Build the scraping report from a stream of results.
+
+    Only counters are kept in memory; failed medications are spooled to a
+    temporary file and copied into the report when it is written.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.successful = 0
+        self.exact_matches = 0
+        self.failed = 0
+        self._failures = tempfile.TemporaryFile('w+', encoding='utf-8')
+
+    def add(self, result: MedicationResult):
+        self.total += 1
+
+        if result.found:
+            self.successful += 1
+            if result.exact_match:
+                self.exact_matches += 1
+        elif result.failure_reason is not None:
+            self.failed += 1
+            varenr_str = result.varenr if result.varenr else "N/A"
+            self._failures.write(f"{self.failed}. {result.input_name}\n")
+            self._failures.write(f"   Varenr: {varenr_str}\n")
+            self._failures.write(f"   Reason: {result.failure_reason}\n\n")
+
+    def write(self, out: TextIO):
+        out.write("=" * 50 + "\n")
+        out.write("SCRAPING REPORT\n")
+        out.write("=" * 50 + "\n\n")
+        out.write(f"Total medications: {self.total}\n")
+        out.write(f"Successfully scraped: {self.successful}\n")
+        out.write(f"Failed: {self.total - self.successful}\n\n")
+
+        if self.failed:
+            out.write("Failed medications (need manual data entry):\n")
+            out.write("-" * 50 + "\n")
+            self._failures.seek(0)
+            shutil.copyfileobj(self._failures, out)
+            self._failures.seek(0, os.SEEK_END)
+
+        out.write(f"\nMatch quality:\n")
+        out.write(f"  Exact matches: {self.exact_matches}\n")
+        out.write(f"  Approximate matches: {self.successful - self.exact_matches}\n")
+
+    def close(self):
+        self._failures.close()
@@ -0,0 +1,88 @@
+import io
+import json
+import os
+
+import pytest
+
+from streaming import JsonArrayWriter, iter_json_array, iter_medications
+
+CHUNK_SIZES = [1, 2, 3, 7, 64]
+
+
+def decode(text, chunk_size):
+    return list(iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_elements_split_across_chunks(chunk_size):
+    data = [
+        {'name': 'Metacam inj. 5 mg/ml', 'varenr': '025388'},
+        {'name': 'Øredråber, "suspension"', 'varenr': ''},
+        [1, 2, [3]], 'text', True, False, None,
+    ]
+    assert decode(json.dumps(data, ensure_ascii=False, indent=2), chunk_size) == data
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_numbers_split_across_chunks(chunk_size):
+    data = [-35000000000.0, -35000000000.0, 12345, 1.5e-7, -2E+10, 0]
+    assert decode(json.dumps(data), chunk_size) == data
+    assert decode('[1e5,2.25]', chunk_size) == [1e5, 2.25]
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_empty_array(chunk_size):
+    assert decode('[]', chunk_size) == []
+    assert decode(' [ \n ] ', chunk_size) == []
+
+
+@pytest.mark.parametrize('text', ['[,,1,,2,]', '[1 2]', '[1,]', '[,1]', '[1,,2]', '{"a": 1}', '[1, 2', '[{"a":'])
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_invalid_input_is_rejected(text, chunk_size):
+    with pytest.raises(ValueError):
+        decode(text, chunk_size)
+
+
+def test_iter_medications_formats(tmp_path):
+    medications = [{'name': 'Rimadyl Vet. 50 mg, tabletter', 'varenr': '018168'},
+                   {'name': 'Otomax, øresalve', 'varenr': ''}]
+
+    json_path = tmp_path / 'input.json'
+    json_path.write_text(json.dumps(medications, ensure_ascii=False), encoding='utf-8')
+    jsonl_path = tmp_path / 'input.jsonl'
+    jsonl_path.write_text('\n'.join(json.dumps(m, ensure_ascii=False) for m in medications) + '\n',
+                          encoding='utf-8')
+    csv_path = tmp_path / 'input.csv'
+    csv_path.write_text('name,varenr\n"Rimadyl Vet. 50 mg, tabletter",018168\n"Otomax, øresalve",\n',
+                        encoding='utf-8')
+
+    for path in (json_path, jsonl_path, csv_path):
+        assert list(iter_medications(str(path))) == medications
+
+
+def test_json_array_writer_matches_json_dump(tmp_path):
+    data = [{'input_name': 'Metacam', 'found': True, 'aktivt_stof': ['Meloxicam : 5 mg/ml']},
+            {'input_name': 'Otomax', 'found': False}]
+    path = tmp_path / 'out.json'
+
+    with JsonArrayWriter(str(path)) as writer:
+        for element in data:
+            writer.write(element)
+    assert path.read_text(encoding='utf-8') == json.dumps(data, ensure_ascii=False, indent=2)
+
+    with JsonArrayWriter(str(path)):
+        pass
+    assert path.read_text(encoding='utf-8') == '[]'
+
+
+def test_json_array_writer_keeps_old_file_on_error(tmp_path):
+    path = tmp_path / 'out.json'
+    path.write_text('["previous"]', encoding='utf-8')
+
+    with pytest.raises(RuntimeError):
+        with JsonArrayWriter(str(path)) as writer:
+            writer.write({'partial': True})
+            raise RuntimeError('interrupted')
+
+    assert path.read_text(encoding='utf-8') == '["previous"]'
+    assert os.listdir(tmp_path) == ['out.json']
@@ -0,0 +1,111 @@
+import time
+
+import pytest
+
+from work_queue import WorkQueue
+
+LEASE_TIMEOUT = 0.2
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.db'), lease_timeout=LEASE_TIMEOUT, max_attempts=2)
+    yield queue
+    queue.close()
+
+
+def expire():
+    time.sleep(LEASE_TIMEOUT * 1.5)
+
+
+def test_enqueue_dedupes_on_name_and_varenr(queue):
+    assert queue.enqueue([{'name': 'Metacam', 'varenr': '025388'},
+                          {'name': 'Otomax', 'varenr': ''},
+                          {'name': 'Metacam', 'varenr': '025388'}]) == 2
+    assert queue.enqueue([{'name': 'Otomax'}, {'name': 'Metacam', 'varenr': '999999'}]) == 1
+    assert queue.counts() == {'pending': 3}
+
+
+def test_lease_hands_out_each_item_once(queue):
+    queue.enqueue([{'name': 'A', 'varenr': '1'}, {'name': 'B', 'varenr': ''}])
+
+    assert queue.lease('w1') == (1, 'A', '1')
+    assert queue.lease('w2') == (2, 'B', '')
+    assert queue.lease('w3') is None
+    assert queue.active_leases() == 2
+
+
+def test_expired_lease_is_leased_again(queue):
+    queue.enqueue([{'name': 'A', 'varenr': '1'}])
+    queue.lease('w1')
+    assert queue.lease('w2') is None
+
+    expire()
+    assert queue.lease('w2') == (1, 'A', '1')
+
+
+def test_complete_after_lost_lease_is_discarded(queue):
+    queue.enqueue([{'name': 'A', 'varenr': '1'}])
+    queue.lease('w1')
+    expire()
+    queue.lease('w2')
+
+    assert not queue.complete(1, 'w1', {'input_name': 'A', 'from': 'w1'})
+    assert queue.complete(1, 'w2', {'input_name': 'A', 'from': 'w2'})
+    assert list(queue.results()) == [{'input_name': 'A', 'from': 'w2'}]
+
+
+def test_complete_after_expiry_without_new_lease_is_kept(queue):
+    queue.enqueue([{'name': 'A', 'varenr': '1'}])
+    queue.lease('w1')
+    expire()
+
+    assert queue.complete(1, 'w1', {'input_name': 'A'})
+    assert queue.counts() == {'done': 1}
+
+
+def test_renew_keeps_lease_alive(queue):
+    queue.enqueue([{'name': 'A', 'varenr': '1'}])
+    queue.lease('w1')
+
+    for _ in range(3):
+        time.sleep(LEASE_TIMEOUT / 2)
+        assert queue.renew(1, 'w1')
+    assert queue.lease('w2') is None
+
+    assert not queue.renew(1, 'w2')
+    assert queue.complete(1, 'w1', {'input_name': 'A'})
+
+
+def test_item_is_abandoned_after_max_attempts(queue):
+    queue.enqueue([{'name': 'A', 'varenr': '1'}])
+    queue.lease('w1')
+    expire()
+    queue.lease('w2')
+    expire()
+
+    assert queue.lease('w3') is None
+    assert queue.counts() == {'abandoned': 1}
+    assert list(queue.results()) == [{
+        'input_name': 'A',
+        'varenr': '1',
+        'found': False,
+        'error': 'Abandoned after 2 attempts without a result'
+    }]
+
+
+def test_results_follow_queue_order(queue):
+    queue.enqueue([{'name': 'A', 'varenr': ''}, {'name': 'B', 'varenr': ''}])
+    queue.lease('w1')
+    queue.lease('w2')
+    queue.complete(2, 'w2', {'input_name': 'B'})
+    queue.complete(1, 'w1', {'input_name': 'A'})
+
+    assert [r['input_name'] for r in queue.results()] == ['A', 'B']
+
+
+def test_reserve_slot_spaces_requests(queue):
+    assert queue.reserve_slot('vetisearch.dk', 1.0) == 0
+    assert queue.reserve_slot('vetisearch.dk', 1.0) == pytest.approx(1.0, abs=0.1)
+    assert queue.reserve_slot('vetisearch.dk', 1.0) == pytest.approx(2.0, abs=0.1)
+    assert queue.reserve_slot('example.com', 1.0) == 0
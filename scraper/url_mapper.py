@@ -3,7 +3,7 @@ URL Mapper - Convert medication names to vetisearch.dk product slugs
 """
 import re
 import requests
-from typing import Optional, List
+from typing import Callable, Optional, List
 
 
 def normalize_danish_text(text: str) -> str:
@@ -97,10 +97,14 @@ def generate_slug_variants(name: str) -> List[str]:
     return variants
 
 
-def find_product_url(name: str, timeout: int = 10) -> Optional[str]:
+def find_product_url(name: str, timeout: int = 10,
+                     before_request: Optional[Callable[[], None]] = None) -> Optional[str]:
     """
     Try to find a working product URL for the medication.
     Returns the product URL if found, None otherwise.
+
+    before_request, if given, is called before every HEAD request (used for
+    rate limiting).
     """
     base_url = "https://vetisearch.dk/products/"
     headers = {
@@ -111,6 +115,8 @@ def find_product_url(name: str, timeout: int = 10) -> Optional[str]:
 
     for slug in variants:
         url = f"{base_url}{slug}"
+        if before_request:
+            before_request()
         try:
             response = requests.head(url, headers=headers, timeout=timeout, allow_redirects=True)
             if response.status_code == 200:
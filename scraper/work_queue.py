@@ -0,0 +1,217 @@
+"""
+Work Queue - Shared SQLite queue for sharding a scrape across worker processes
+"""
+import json
+import sqlite3
+import time
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    varenr TEXT NOT NULL DEFAULT '',
+    state TEXT NOT NULL DEFAULT 'pending',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    UNIQUE (name, varenr)
+);
+CREATE INDEX IF NOT EXISTS items_state ON items (state, lease_expires);
+CREATE TABLE IF NOT EXISTS rate_limits (
+    host TEXT PRIMARY KEY,
+    next_slot REAL NOT NULL
+);
+"""
+
+
+class WorkQueue:
+    """
+    Medication queue shared by a coordinator and any number of workers.
+
+    Workers lease items with a visibility timeout and renew the lease while
+    they work on an item. A lease that is neither renewed nor completed
+    before it expires (e.g. because the worker crashed) makes the
+    item available to other workers again, up to max_attempts leases; after
+    that the item is abandoned and reported as failed. The queue also holds
+    a per-host request schedule so all workers share one politeness budget.
+
+    The database uses WAL mode, which needs shared memory: all processes
+    must run on the same host, not on a network filesystem.
+    """
+
+    def __init__(self, path: str, lease_timeout: float = 300.0, max_attempts: int = 3):
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        # Autocommit mode; write transactions are opened explicitly with
+        # BEGIN IMMEDIATE so concurrent workers serialize on the write lock.
+        # Callers sharing the queue between threads must serialize access.
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _write(self):
+        """Open a write transaction, returning the connection."""
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def enqueue(self, medications: Iterable[Dict]) -> int:
+        """
+        Add medications to the queue, skipping ones already queued.
+
+        Returns:
+            Number of newly queued medications
+        """
+        conn = self._write()
+        try:
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO items (name, varenr) VALUES (?, ?)',
+                ((med['name'], med.get('varenr') or '') for med in medications)
+            )
+            added = conn.total_changes - before
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return added
+
+    def lease(self, worker_id: str) -> Optional[Tuple[int, str, str]]:
+        """
+        Lease the next available medication.
+
+        Pending items and items whose lease has expired are both eligible.
+        Expired items that have used up their attempts are abandoned instead.
+
+        Returns:
+            (item_id, name, varenr) or None if nothing is available right now
+        """
+        now = time.time()
+        conn = self._write()
+        try:
+            conn.execute(
+                "UPDATE items SET state = 'abandoned', lease_owner = NULL, lease_expires = NULL "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT id, name, varenr FROM items "
+                "WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE items SET state = 'leased', lease_owner = ?, "
+                    "lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                    (worker_id, now + self.lease_timeout, row[0])
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return row
+
+    def renew(self, item_id: int, worker_id: str, extra: float = 0.0) -> bool:
+        """
+        Extend a lease to lease_timeout (plus extra) seconds from now.
+
+        Returns:
+            False if the lease was lost to another worker
+        """
+        conn = self._write()
+        try:
+            cursor = conn.execute(
+                "UPDATE items SET lease_expires = ? "
+                "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                (time.time() + extra + self.lease_timeout, item_id, worker_id)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return cursor.rowcount == 1
+
+    def complete(self, item_id: int, worker_id: str, result: Dict) -> bool:
+        """
+        Store the result for a leased item.
+
+        Returns:
+            False if the lease was lost to another worker (result discarded)
+        """
+        conn = self._write()
+        try:
+            cursor = conn.execute(
+                "UPDATE items SET state = 'done', result = ?, lease_expires = NULL "
+                "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                (json.dumps(result, ensure_ascii=False), item_id, worker_id)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return cursor.rowcount == 1
+
+    def reserve_slot(self, host: str, delay: float) -> float:
+        """
+        Reserve the next request slot for a host, shared by all workers.
+
+        Returns:
+            Seconds the caller must wait before making its request
+        """
+        now = time.time()
+        conn = self._write()
+        try:
+            row = conn.execute(
+                'SELECT next_slot FROM rate_limits WHERE host = ?', (host,)
+            ).fetchone()
+            slot = max(now, row[0]) if row else now
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limits (host, next_slot) VALUES (?, ?)',
+                (host, slot + delay)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return slot - now
+
+    def active_leases(self) -> int:
+        """Number of items currently leased and not yet expired."""
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM items WHERE state = 'leased' AND lease_expires >= ?",
+            (time.time(),)
+        ).fetchone()
+        return row[0]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of items per state."""
+        rows = self.conn.execute('SELECT state, COUNT(*) FROM items GROUP BY state')
+        return dict(rows.fetchall())
+
+    def results(self) -> Iterator[Dict]:
+        """
+        Yield finished results in the order the medications were queued.
+
+        Abandoned items are included as failed results.
+        """
+        rows = self.conn.execute(
+            "SELECT name, varenr, state, attempts, result FROM items "
+            "WHERE state IN ('done', 'abandoned') ORDER BY id"
+        )
+        for name, varenr, state, attempts, result in rows:
+            if state == 'done':
+                yield json.loads(result)
+            else:
+                yield {
+                    'input_name': name,
+                    'varenr': varenr,
+                    'found': False,
+                    'error': f"Abandoned after {attempts} attempts without a result"
+                }
@@ -1,20 +1,22 @@
 #!/usr/bin/env python3
 """
 Simple HTTP server for local testing of the flash cards application.
-Serves files from the 'public' directory on port 8000.
+Serves files from the 'docs' directory on port 8000.
 """
+import functools
 import http.server
 import socketserver
 import os
 import sys
 
 PORT = 8000
-DIRECTORY = "public"
+DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "docs")
 
 
 class Handler(http.server.SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
-        super().__init__(*args, directory=DIRECTORY, **kwargs)
+        kwargs.setdefault('directory', DIRECTORY)
+        super().__init__(*args, **kwargs)
 
     def end_headers(self):
         # CORS headers for local testing
@@ -30,22 +32,22 @@ class Handler(http.server.SimpleHTTPRequestHandler):
                          format % args))
 
 
-if __name__ == "__main__":
-    # Change to script directory
-    os.chdir(os.path.dirname(os.path.abspath(__file__)))
-
-    # Check if public directory exists
-    if not os.path.exists(DIRECTORY):
-        print(f"❌ Error: '{DIRECTORY}' directory not found!")
+def serve(directory: str = DIRECTORY, port: int = PORT):
+    """Serve the frontend until interrupted."""
+    # Check if the frontend directory exists
+    if not os.path.exists(directory):
+        print(f"❌ Error: '{directory}' directory not found!")
         sys.exit(1)
 
+    handler = functools.partial(Handler, directory=directory)
+
     # Create server
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
+    with socketserver.TCPServer(("", port), handler) as httpd:
         print("=" * 60)
         print(f"🚀 Flash Cards Server Running")
         print("=" * 60)
-        print(f"📁 Serving files from: {os.path.abspath(DIRECTORY)}")
-        print(f"🌐 Open in browser: http://localhost:{PORT}/")
+        print(f"📁 Serving files from: {os.path.abspath(directory)}")
+        print(f"🌐 Open in browser: http://localhost:{port}/")
         print(f"")
         print(f"Press Ctrl+C to stop the server")
         print("=" * 60)
@@ -55,3 +57,7 @@ if __name__ == "__main__":
         except KeyboardInterrupt:
             print("\n\n👋 Server stopped")
             sys.exit(0)
+
+
+if __name__ == "__main__":
+    serve()
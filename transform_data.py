@@ -3,70 +3,95 @@
 Transform scraped data to frontend format.
 Reads from data/medications_scraped.json and writes to docs/data/medications.json
 """
-import json
 import os
+import sys
+from typing import Dict, Iterable, Iterator
 
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRAPER_DIR = os.path.join(ROOT_DIR, 'scraper')
+INPUT_FILE = os.path.join(ROOT_DIR, 'data', 'medications_scraped.json')
+OUTPUT_FILE = os.path.join(ROOT_DIR, 'docs', 'data', 'medications.json')
 
-def transform_data():
-    """Transform scraped data for frontend consumption."""
-    input_file = 'data/medications_scraped.json'
-    output_file = 'docs/data/medications.json'
+# Shared streaming reader/writer (stdlib only, so no scraping stack is loaded)
+if SCRAPER_DIR not in sys.path:
+    sys.path.insert(0, SCRAPER_DIR)
+from streaming import JsonArrayWriter, iter_medications  # noqa: E402
 
-    # Check if input file exists
-    if not os.path.exists(input_file):
-        print(f"❌ Error: {input_file} not found!")
-        print("Please run the scraper first: python3 scraper/scraper.py")
-        return False
 
-    # Load scraped data
-    print(f"📖 Reading scraped data from {input_file}...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        scraped = json.load(f)
+def transform_record(med: Dict) -> Dict:
+    """Convert one scraped medication record to a flash card record."""
+    card = {
+        'input_name': med['input_name'],
+        'varenr': med['varenr'],
+        'found': med['found']
+    }
+
+    if med['found']:
+        card.update({
+            'exact_match': med['exact_match'],
+            'variant_name': med['variant_name'],
+            'spc_url': med['spc_url'],
+            'aktivt_stof': med['aktivt_stof'],
+            'indikationer': med['indikationer']
+        })
+
+    return card
 
-    # Transform to frontend format
-    print(f"🔄 Transforming {len(scraped)} medications...")
-    frontend_data = []
 
+def transform_records(scraped: Iterable[Dict]) -> Iterator[Dict]:
+    """Convert scraped medication records to flash card records."""
     for med in scraped:
-        card = {
-            'input_name': med['input_name'],
-            'varenr': med['varenr'],
-            'found': med['found']
-        }
-
-        if med['found']:
-            card.update({
-                'exact_match': med['exact_match'],
-                'variant_name': med['variant_name'],
-                'spc_url': med['spc_url'],
-                'aktivt_stof': med['aktivt_stof'],
-                'indikationer': med['indikationer']
-            })
-
-        frontend_data.append(card)
+        yield transform_record(med)
 
+
+def write_frontend_data(frontend_data: Iterable[Dict], output_file: str = OUTPUT_FILE):
+    """Save flash card records for the frontend and print a summary."""
     # Ensure output directory exists
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
 
-    # Save to public directory
+    successful = 0
+
+    # Save to public directory, one card at a time
     print(f"💾 Saving to {output_file}...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(frontend_data, f, ensure_ascii=False, indent=2)
+    with JsonArrayWriter(output_file) as out:
+        for card in frontend_data:
+            out.write(card)
+            if card['found']:
+                successful += 1
+    total = out.count
 
     # Print summary
-    successful = sum(1 for m in frontend_data if m['found'])
-    failed = len(frontend_data) - successful
+    failed = total - successful
 
     print("\n" + "=" * 60)
     print("✅ Data transformation complete!")
     print("=" * 60)
-    print(f"Total medications: {len(frontend_data)}")
+    print(f"Total medications: {total}")
     print(f"Successfully scraped: {successful}")
     print(f"Failed/missing: {failed}")
     print(f"\n📁 Frontend data saved to: {output_file}")
     print("\nNext step: Run 'python3 server.py' to test locally")
     print("=" * 60)
 
+
+def transform_data(input_file: str = INPUT_FILE, output_file: str = OUTPUT_FILE) -> bool:
+    """Transform scraped data for frontend consumption."""
+    # Check if input file exists
+    if not os.path.exists(input_file):
+        print(f"❌ Error: {input_file} not found!")
+        print("Please run the scraper first: python3 scraper/scraper.py")
+        return False
+
+    # Stream scraped data
+    print(f"📖 Reading scraped data from {input_file}...")
+    scraped = iter_medications(input_file)
+
+    # Transform to frontend format
+    print("🔄 Transforming medications...")
+    frontend_data = transform_records(scraped)
+
+    write_frontend_data(frontend_data, output_file)
+
     return True
 
 